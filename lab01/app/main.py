@@ -1,12 +1,20 @@
 from fastapi import FastAPI, Query, Path
+from fastapi.responses import ORJSONResponse
 from enum import Enum
 from typing import Optional, List
 from datetime import datetime
+import re
+
+# Pre-compiled validation patterns (compiled once at import, not per request)
+EMAIL_RE = re.compile(r'^[^@]+@[^@]+\.[^@]+$')
+CURRENCY_RE = re.compile(r'^[A-Z]{3}$')
+FORMAT_RE = re.compile(r'^(json|xml|csv)$')
 
 app = FastAPI(
     title="FastAPI Fundamentals Lab",
     description="A comprehensive API demonstrating FastAPI fundamentals",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Health check endpoint
@@ -87,16 +95,19 @@ def search_blogs(
     published_after: Optional[str] = Query(None, description="Published after date (YYYY-MM-DD)")
 ):
     """Search blogs with multiple optional filters"""
-    filters = {
-        "query": q,
-        "category": category,
-        "author": author,
-        "tags": tags,
-        "published_after": published_after
-    }
-    # Remove None values
-    active_filters = {k: v for k, v in filters.items() if v is not None}
-    
+    # Build the filter dict in one pass, inserting only the provided values
+    active_filters = {}
+    if q is not None:
+        active_filters["query"] = q
+    if category is not None:
+        active_filters["category"] = category
+    if author is not None:
+        active_filters["author"] = author
+    if tags is not None:
+        active_filters["tags"] = tags
+    if published_after is not None:
+        active_filters["published_after"] = published_after
+
     return {
         "message": "Blog search results",
         "filters_applied": active_filters,
@@ -110,7 +121,7 @@ def get_user_post(
     post_id: int = Path(..., gt=0, description="Post ID"),
     include_comments: bool = Query(False, description="Include comments in response"),
     include_likes: bool = Query(False, description="Include likes count"),
-    format: str = Query("json", regex="^(json|xml|csv)$", description="Response format")
+    format: str = Query("json", regex=FORMAT_RE.pattern, description="Response format")
 ):
     """Get a specific post from a user with various options"""
     return {
@@ -125,7 +136,7 @@ def get_user_post(
 # String validation with regex
 @app.get("/validate/email/{email}")
 def validate_email(
-    email: str = Path(..., regex=r'^[^@]+@[^@]+\.[^@]+$', description="Valid email address")
+    email: str = Path(..., regex=EMAIL_RE.pattern, description="Valid email address")
 ):
     """Validate email format using regex"""
     return {"email": email, "message": "Valid email format"}
@@ -135,7 +146,7 @@ def validate_email(
 def get_product(
     product_id: int = Path(..., ge=1, le=999999, description="Product ID"),
     discount: Optional[float] = Query(None, ge=0.0, le=100.0, description="Discount percentage"),
-    currency: str = Query("USD", regex="^[A-Z]{3}$", description="3-letter currency code")
+    currency: str = Query("USD", regex=CURRENCY_RE.pattern, description="3-letter currency code")
 ):
     """Get product with price calculations"""
     return {
@@ -178,7 +189,7 @@ def test_parameters(
     hobbies: List[str] = Query([], description="List of hobbies"),
     
     # Optional parameters
-    email: Optional[str] = Query(None, regex=r'^[^@]+@[^@]+\.[^@]+$', description="Email address"),
+    email: Optional[str] = Query(None, regex=EMAIL_RE.pattern, description="Email address"),
     phone: Optional[str] = Query(None, description="Phone number")
 ):
     """Test endpoint with various parameter types and validations"""
@@ -1,3 +1,4 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from . import models, schemas
 from typing import List, Optional
@@ -11,14 +12,28 @@ def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
 def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.username == username).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_users(db: Session, after_id: int = 0, limit: int = 100) -> List[models.User]:
+    # Keyset pagination: index seek on the primary key instead of the
+    # O(skip) row scan OFFSET incurs
+    return (
+        db.query(models.User)
+        .filter(models.User.id > after_id)
+        .order_by(models.User.id)
+        .limit(limit)
+        .all()
+    )
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
-    db_user = models.User(email=user.email, username=user.username)
-    db.add(db_user)
+def create_user(db: Session, user: schemas.UserCreate) -> Optional[models.User]:
+    # Single round trip: insert and return the row, or None if a unique
+    # constraint (email/username) already holds the value
+    stmt = (
+        pg_insert(models.User)
+        .values(email=user.email, username=user.username)
+        .on_conflict_do_nothing()
+        .returning(models.User)
+    )
+    db_user = db.scalars(stmt).one_or_none()
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> Optional[models.User]:
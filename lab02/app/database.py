@@ -8,7 +8,16 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Sized pool + statement cache: avoids checkout contention under load and
+# reuses parsed SQL instead of recompiling per query
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=50,
+    max_overflow=50,
+    pool_timeout=5,
+    pool_recycle=1800,
+    query_cache_size=1200,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,4 +1,6 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -8,31 +10,35 @@ from .database import engine, get_db
 # Create tables (for development - use Alembic in production)
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="User Management API", version="1.0.0")
+app = FastAPI(title="User Management API", version="1.0.0", default_response_class=ORJSONResponse)
 
 @app.post("/users/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    # Check if user already exists
-    db_user = crud.get_user_by_email(db, email=user.email)
-    if db_user:
-        raise HTTPException(
-            status_code=400,
-            detail="Email already registered"
-        )
-    
-    db_user = crud.get_user_by_username(db, username=user.username)
-    if db_user:
+    # INSERT ... ON CONFLICT DO NOTHING: one round trip instead of two
+    # existence checks plus an insert (and no race window between them)
+    db_user = crud.create_user(db=db, user=user)
+    if db_user is None:
+        # Conflict - one follow-up SELECT to find out which constraint fired
+        existing = db.query(models.User).filter(
+            or_(models.User.email == user.email, models.User.username == user.username)
+        ).first()
+        if existing and existing.email == user.email:
+            raise HTTPException(
+                status_code=400,
+                detail="Email already registered"
+            )
         raise HTTPException(
             status_code=400,
             detail="Username already taken"
         )
-    
-    return crud.create_user(db=db, user=user)
 
-@app.get("/users/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = crud.get_users(db, skip=skip, limit=limit)
-    return users
+    return db_user
+
+@app.get("/users/", response_model=schemas.UserPage)
+def read_users(after_id: int = 0, limit: int = Query(100, le=500), db: Session = Depends(get_db)):
+    # Keyset cursor: pass next_cursor back as after_id for the next page
+    users = crud.get_users(db, after_id=after_id, limit=limit)
+    return {"items": users, "next_cursor": users[-1].id if users else None}
 
 @app.get("/users/{user_id}", response_model=schemas.User)
 def read_user(user_id: int, db: Session = Depends(get_db)):
@@ -43,23 +49,27 @@ def read_user(user_id: int, db: Session = Depends(get_db)):
 
 @app.put("/users/{user_id}", response_model=schemas.User)
 def update_user(user_id: int, user_update: schemas.UserUpdate, db: Session = Depends(get_db)):
-    # Check if email/username already exists (if being updated)
+    # Check email/username conflicts (if being updated) in a single query
+    conditions = []
     if user_update.email:
-        existing_user = crud.get_user_by_email(db, email=user_update.email)
-        if existing_user and existing_user.id != user_id:
-            raise HTTPException(
-                status_code=400,
-                detail="Email already registered"
-            )
-    
+        conditions.append(models.User.email == user_update.email)
     if user_update.username:
-        existing_user = crud.get_user_by_username(db, username=user_update.username)
-        if existing_user and existing_user.id != user_id:
+        conditions.append(models.User.username == user_update.username)
+    if conditions:
+        conflict = db.query(models.User).filter(
+            or_(*conditions), models.User.id != user_id
+        ).first()
+        if conflict:
+            if user_update.email and conflict.email == user_update.email:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Email already registered"
+                )
             raise HTTPException(
                 status_code=400,
                 detail="Username already taken"
             )
-    
+
     db_user = crud.update_user(db, user_id=user_id, user_update=user_update)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
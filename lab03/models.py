@@ -0,0 +1,48 @@
+from pydantic import BaseModel, Field
+from bson import ObjectId
+from typing import List, Optional
+from datetime import datetime
+import msgspec
+
+# This module is cythonized (see setup.py) so model construction runs as
+# compiled code; it stays importable as plain Python when no .so is built.
+
+class PyObjectId(ObjectId):
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, v):
+        if not ObjectId.is_valid(v):
+            raise ValueError("Invalid objectid")
+        return ObjectId(v)
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(type="string")
+
+class NoteModel(BaseModel):
+    id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
+    title: str = Field(..., min_length=1, max_length=100)
+    content: str = Field(..., min_length=1)
+    tags: Optional[List[str]] = []
+
+    class Config:
+        allow_population_by_field_name = True
+        arbitrary_types_allowed = True
+        json_encoders = {ObjectId: str}
+
+class NoteCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=100)
+    content: str = Field(..., min_length=1)
+    tags: Optional[List[str]] = []
+
+class NoteResponse(msgspec.Struct, rename={"id": "_id"}):
+    """Output model encoded straight to JSON by msgspec (no per-field validators)"""
+    id: str
+    title: str
+    content: str
+    tags: List[str] = msgspec.field(default_factory=list)
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
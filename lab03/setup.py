@@ -0,0 +1,10 @@
+from setuptools import setup
+from Cython.Build import cythonize
+
+# Build with: python setup.py build_ext --inplace
+# Compiles the model definitions to a C extension for faster construction;
+# main.py picks up the resulting .so automatically.
+setup(
+    name="lab03-models",
+    ext_modules=cythonize(["models.py"], language_level=3),
+)
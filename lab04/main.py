@@ -1,6 +1,8 @@
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from database import engine, Base
+from middleware.cors import FastCORS
+from middleware.routing import StaticRouteCache
 from routes import auth, users
 
 # Create database tables
@@ -10,39 +12,47 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="JWT Authentication API",
     description="A simple JWT authentication API with FastAPI and PostgreSQL",
-    version="1.0.0"
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 
+# Static payloads shared by the handlers and the fast-path dispatcher
+ROOT_INFO = {
+    "message": "JWT Authentication API",
+    "version": "1.0.0",
+    "endpoints": {
+        "signup": "/auth/signup",
+        "login": "/auth/login",
+        "profile": "/users/profile",
+        "docs": "/docs"
+    }
+}
+HEALTH_STATUS = {"status": "healthy"}
+
 
 @app.get("/")
 def read_root():
     """Root endpoint."""
-    return {
-        "message": "JWT Authentication API",
-        "version": "1.0.0",
-        "endpoints": {
-            "signup": "/auth/signup",
-            "login": "/auth/login",
-            "profile": "/users/profile",
-            "docs": "/docs"
-        }
-    }
+    return ROOT_INFO
 
 
 @app.get("/health")
 def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
\ No newline at end of file
+    return HEALTH_STATUS
+
+
+# Serve the frozen static routes from pre-encoded responses, skipping the
+# router's linear route scan entirely
+app.add_middleware(StaticRouteCache, responses={
+    ("GET", "/"): ROOT_INFO,
+    ("GET", "/health"): HEALTH_STATUS,
+})
+
+# Allow-all CORS at the ASGI level (outermost, so even the static fast
+# path gets the headers); in production, replace with specific origins
+app.add_middleware(FastCORS)
\ No newline at end of file
@@ -1,3 +1,7 @@
+import hashlib
+import threading
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -9,6 +13,22 @@ from models import User
 # Security scheme
 security = HTTPBearer()
 
+# Short-lived cache of verified tokens keyed by a cheap token hash: a hit
+# replaces an HMAC verification plus a user SELECT with one dict lookup.
+# The TTL must stay below access_token_expire_minutes so expiry is enforced.
+_token_cache = TTLCache(maxsize=4096, ttl=60)
+_token_cache_lock = threading.Lock()
+
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def revoke_token(token: str) -> None:
+    """Drop a token from the verification cache (e.g. on logout)."""
+    with _token_cache_lock:
+        _token_cache.pop(_token_cache_key(token), None)
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -20,19 +40,28 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+    token = credentials.credentials
+    cache_key = _token_cache_key(token)
+    with _token_cache_lock:
+        cached_user = _token_cache.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+
     try:
-        token = credentials.credentials
         username = verify_token(token)
         if username is None:
             raise credentials_exception
     except Exception:
         raise credentials_exception
-    
+
     user = get_user_by_username(db, username=username)
     if user is None:
         raise credentials_exception
-    
+
+    with _token_cache_lock:
+        _token_cache[cache_key] = user
+
     return user
 
 
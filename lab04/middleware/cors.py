@@ -0,0 +1,54 @@
+# Static tail appended to every response. allow-origin is echoed per
+# request instead: browsers reject the * wildcard on credentialed
+# requests, and we advertise allow-credentials
+_CORS_HEADERS = [
+    (b"access-control-allow-methods", b"*"),
+    (b"access-control-allow-credentials", b"true"),
+    (b"vary", b"origin"),
+]
+
+
+class FastCORS:
+    """Minimal allow-all CORS handling at the ASGI level.
+
+    Answers OPTIONS preflights directly and appends a pre-built header
+    list to every other response, skipping CORSMiddleware's per-request
+    origin matching. The origin and requested headers are echoed back
+    (the Fetch spec excludes Authorization from the * header wildcard,
+    so a static reply would fail preflight for JWT clients). Only valid
+    while the app allows every origin; deployments restricting origins
+    should switch back to Starlette's CORSMiddleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        origin = headers.get(b"origin", b"*")
+
+        if scope["method"] == "OPTIONS":
+            await send({
+                "type": "http.response.start",
+                "status": 204,
+                "headers": [
+                    (b"access-control-allow-origin", origin),
+                    (b"access-control-allow-headers",
+                     headers.get(b"access-control-request-headers", b"*")),
+                ] + _CORS_HEADERS,
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message["headers"]) + [
+                    (b"access-control-allow-origin", origin),
+                ] + _CORS_HEADERS
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
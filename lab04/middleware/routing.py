@@ -0,0 +1,39 @@
+import orjson
+
+
+class StaticRouteCache:
+    """ASGI fast path for frozen static routes.
+
+    Starlette's router scans its route list linearly and runs the full
+    request/response machinery even for endpoints that always return the
+    same payload. The route set is frozen after startup, so responses for
+    those routes are pre-encoded once and served straight from a dict
+    keyed by (method, path) - the hash-map layer of a radix dispatcher.
+    Everything else (dynamic paths, other methods) falls through to the app.
+    """
+
+    def __init__(self, app, responses: dict = None):
+        self.app = app
+        self._responses = {}
+        for (method, path), payload in (responses or {}).items():
+            body = orjson.dumps(payload)
+            headers = [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ]
+            self._responses[(method, path)] = (headers, body)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            cached = self._responses.get((scope["method"], scope["path"]))
+            if cached is not None:
+                headers, body = cached
+                await send({
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": headers,
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        await self.app(scope, receive, send)
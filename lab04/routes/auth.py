@@ -1,4 +1,7 @@
+import os
 from datetime import timedelta
+import anyio
+import anyio.to_thread
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db
@@ -9,6 +12,11 @@ from config import settings
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+# bcrypt verification is deliberately slow CPU work (tens of ms); run it on
+# a bounded worker thread so it never stalls the event loop, with at most
+# one verification per core in flight
+_auth_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+
 
 @router.post("/signup", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
 def signup(user: UserCreate, db: Session = Depends(get_db)):
@@ -18,9 +26,15 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """Authenticate user and return access token."""
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    user = await anyio.to_thread.run_sync(
+        authenticate_user,
+        db,
+        user_credentials.username,
+        user_credentials.password,
+        limiter=_auth_limiter,
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,9 +1,13 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import User
 
@@ -22,10 +26,15 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authenticate user with username and password"""
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if not user:
+        return None
+    # bcrypt is ~250ms of pure CPU; run it in a worker thread so it
+    # doesn't stall every other request on this event loop
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return None
     return user
 
@@ -40,13 +49,27 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def decode_token(token: str) -> dict:
-    """Decode JWT token"""
+@lru_cache(maxsize=8192)
+def _decode_verified(token: str) -> dict:
+    """Verify and decode a JWT, memoized per token string"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
-        )
\ No newline at end of file
+        )
+
+def decode_token(token: str) -> dict:
+    """Decode JWT token (signature check runs once per token)"""
+    payload = _decode_verified(token)
+    # Cache hits skip jose's expiry validation, so recheck it here.
+    # exp is epoch seconds, so compare against time.time() - a naive
+    # utcnow().timestamp() would be read as local time
+    exp = payload.get("exp")
+    if exp is not None and time.time() >= exp:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    return payload
\ No newline at end of file
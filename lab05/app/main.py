@@ -1,10 +1,16 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from pymongo import IndexModel
+from sqlalchemy import select, or_, exists
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import List, Optional
+import asyncio
+import json
+import logging
 
-from app.database import get_db, get_mongo, engine, Base
+from app.database import get_db, get_mongo, get_redis, engine, Base
 from app.models import User
 from app.schemas import (
     UserCreate, User as UserSchema, UserLogin, Token, UserResponse,
@@ -15,16 +21,98 @@ from app.auth import (
     decode_token, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="FastAPI SQL + NoSQL Demo with Authentication")
+# orjson serializes responses several times faster than the stdlib json
+# encoder and handles datetimes natively
+app = FastAPI(
+    title="FastAPI SQL + NoSQL Demo with Authentication",
+    default_response_class=ORJSONResponse
+)
 security = HTTPBearer()
+logger = logging.getLogger(__name__)
+
+# Log documents are enqueued by handlers and bulk-written by a background
+# task, so MongoDB round-trip latency stays out of user-visible requests
+log_queue: asyncio.Queue = asyncio.Queue()
+LOG_FLUSH_INTERVAL = 0.5  # seconds
+LOG_FLUSH_MAX_BATCH = 1000
+
+async def flush_log_queue():
+    """Drain queued log documents into MongoDB with batched insert_many"""
+    mongo_collection = get_mongo()
+    while True:
+        batch = [await log_queue.get()]
+        # Short flush window lets concurrent requests fill the batch
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        while len(batch) < LOG_FLUSH_MAX_BATCH:
+            try:
+                batch.append(log_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await mongo_collection.insert_many(batch, ordered=False)
+        except Exception as e:
+            print(f"❌ Failed to flush {len(batch)} log(s) to MongoDB: {e}")
+
+@app.on_event("startup")
+async def startup_event():
+    """Create tables (the async engine cannot do this at import time)"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # Compound indexes matching the filter+sort shape of the log queries,
+    # so they run as index scans instead of collection scans
+    await get_mongo().create_indexes([
+        IndexModel([("user_id", 1), ("login_timestamp", -1)]),
+        IndexModel([("username", 1), ("timestamp", -1)]),
+        IndexModel([("action", 1), ("login_timestamp", -1)]),
+        IndexModel([("username", 1), ("action", 1), ("login_timestamp", -1)]),
+    ])
+
+    # Start the log flusher on the running event loop
+    app.state.log_flusher = asyncio.create_task(flush_log_queue())
 
-# In-memory store for active sessions (in production, use Redis)
-active_sessions = {}
+# Only the fields LogResponse serializes; an explicit projection keeps
+# Mongo from shipping anything else over the wire
+LOG_PROJECTION = {
+    "_id": 0,
+    "user_id": 1,
+    "username": 1,
+    "action": 1,
+    "timestamp": 1,
+    "login_timestamp": 1,
+    "logout_timestamp": 1,
+    "session_duration": 1,
+    "details": 1,
+}
+LOG_BATCH_SIZE = 500
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def _log_response(log: dict) -> LogResponse:
+    """Build a LogResponse from a Mongo doc; model_construct skips
+    validation since the types are already known"""
+    return LogResponse.model_construct(
+        user_id=log["user_id"],
+        username=log["username"],
+        action=log["action"],
+        timestamp=log.get("timestamp") or log.get("login_timestamp"),
+        login_timestamp=log.get("login_timestamp"),
+        logout_timestamp=log.get("logout_timestamp"),
+        session_duration=log.get("session_duration"),
+        details=log.get("details")
+    )
+
+def _logs_before_filter(before: datetime) -> dict:
+    """Keyset filter for mixed log docs: session logs carry
+    login_timestamp, custom logs only timestamp"""
+    return {"$or": [
+        {"login_timestamp": {"$lt": before}},
+        {"login_timestamp": None, "timestamp": {"$lt": before}},
+    ]}
+
+# Short TTL for the per-token user cache: saves one SQL query per
+# authenticated request while bounding staleness
+USER_CACHE_TTL = 60
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)):
     """Get current authenticated user"""
     token = credentials.credentials
     payload = decode_token(token)
@@ -34,13 +122,42 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
-    
-    user = db.query(User).filter(User.username == username).first()
+
+    # The cache only saves a SELECT; a Redis outage must not take the
+    # auth path down with it, so degrade to Postgres on any error
+    redis = get_redis()
+    try:
+        cached = await redis.get(f"user:{token}")
+    except Exception as e:
+        logger.warning(f"User cache read failed: {e}")
+        cached = None
+    if cached is not None:
+        data = json.loads(cached)
+        # Transient ORM object is enough for the read-only endpoints
+        return User(
+            id=data["id"],
+            username=data["username"],
+            email=data["email"],
+            is_active=data["is_active"]
+        )
+
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+
+    try:
+        await redis.setex(f"user:{token}", USER_CACHE_TTL, json.dumps({
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "is_active": user.is_active
+        }))
+    except Exception as e:
+        logger.warning(f"User cache write failed: {e}")
     return user
 
 @app.get("/")
@@ -49,30 +166,33 @@ def read_root():
 
 # Authentication endpoints
 @app.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
-    # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-    
-    # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    # Check username and email in one round trip
+    result = await db.execute(
+        select(User.username, User.email).where(
+            or_(User.username == user.username, User.email == user.email)
+        )
+    )
+    existing = result.first()
+    if existing:
+        if existing.username == user.username:
+            raise HTTPException(status_code=400, detail="Username already registered")
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+
+    # Create new user (hashing runs in a worker thread - bcrypt would
+    # otherwise block the event loop for hundreds of milliseconds)
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
     db_user = User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
-    return UserResponse(
+    return UserResponse.model_construct(
         id=db_user.id,
         username=db_user.username,
         email=db_user.email,
@@ -80,9 +200,9 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     )
 
 @app.post("/login", response_model=Token)
-def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Login user - only stores session info, no log created yet"""
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -96,19 +216,24 @@ def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
     )
     
     login_time = datetime.utcnow()
-    
-    # Store session info for logout tracking (NO LOG CREATED YET)
-    active_sessions[access_token] = {
-        "user_id": user.id,
-        "username": user.username,
-        "login_time": login_time,
-        "token_expires": login_time + access_token_expires
-    }
-    
+
+    # Store session info in Redis for logout tracking (NO LOG CREATED YET);
+    # a shared store works across workers, and the TTL matches the token
+    # so stale sessions expire on their own
+    await get_redis().setex(
+        f"session:{access_token}",
+        int(access_token_expires.total_seconds()),
+        json.dumps({
+            "user_id": user.id,
+            "username": user.username,
+            "login_time": login_time.isoformat()
+        })
+    )
+
     return Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse(
+        user=UserResponse.model_construct(
             id=user.id,
             username=user.username,
             email=user.email,
@@ -117,20 +242,26 @@ def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
     )
 
 @app.post("/logout")
-def logout_user(credentials: HTTPAuthorizationCredentials = Depends(security), current_user: User = Depends(get_current_user)):
+async def logout_user(credentials: HTTPAuthorizationCredentials = Depends(security), current_user: User = Depends(get_current_user)):
     """Logout user and CREATE session log with duration"""
     token = credentials.credentials
-    
-    if token not in active_sessions:
+
+    # One pipelined round trip: GETDEL the session and drop the cached
+    # user for the now-dead token together
+    pipe = get_redis().pipeline()
+    pipe.getdel(f"session:{token}")
+    pipe.delete(f"user:{token}")
+    session_data, _ = await pipe.execute()
+    if session_data is None:
         raise HTTPException(status_code=400, detail="No active session found")
-    
-    session_info = active_sessions[token]
+
+    session_info = json.loads(session_data)
     logout_time = datetime.utcnow()
-    login_time = session_info["login_time"]
+    login_time = datetime.fromisoformat(session_info["login_time"])
     session_duration = int((logout_time - login_time).total_seconds())
     
-    # CREATE the session log in MongoDB (only when user logs out)
-    mongo_collection = get_mongo()
+    # CREATE the session log (only when user logs out); the background
+    # task bulk-writes it to MongoDB
     session_log = {
         "user_id": session_info["user_id"],
         "username": session_info["username"],
@@ -144,24 +275,20 @@ def logout_user(credentials: HTTPAuthorizationCredentials = Depends(security), c
         }
     }
     
-    result = mongo_collection.insert_one(session_log)
-    
-    # Remove from active sessions
-    del active_sessions[token]
-    
+    log_queue.put_nowait(session_log)
+
     return {
-        "message": f"Successfully logged out. Session log created.",
+        "message": "Successfully logged out. Session log queued.",
         "session_duration": session_duration,
         "login_time": login_time.isoformat(),
-        "logout_time": logout_time.isoformat(),
-        "log_id": str(result.inserted_id)
+        "logout_time": logout_time.isoformat()
     }
 
 # User endpoints
 @app.get("/users/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information"""
-    return UserResponse(
+    return UserResponse.model_construct(
         id=current_user.id,
         username=current_user.username,
         email=current_user.email,
@@ -169,12 +296,13 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
     )
 
 @app.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     """Get user by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserResponse(
+    return UserResponse.model_construct(
         id=user.id,
         username=user.username,
         email=user.email,
@@ -183,135 +311,107 @@ def get_user(user_id: int, db: Session = Depends(get_db), current_user: User = D
 
 # Log endpoints
 @app.post("/users/{user_id}/logs")
-def create_custom_log(
-    user_id: int, 
-    log: LogCreate, 
-    db: Session = Depends(get_db),
+async def create_custom_log(
+    user_id: int,
+    log: LogCreate,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Add custom activity log for user"""
-    # Verify user exists
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # Narrow index-only lookup: the log doc only needs the username
+    username = await db.scalar(select(User.username).where(User.id == user_id))
+    if username is None:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # Save log to MongoDB
-    mongo_collection = get_mongo()
+
+    # Queue the log for the background bulk writer
     log_doc = {
         "user_id": user_id,
-        "username": user.username,
-        "action": log.action,
+        "username": username,
+        "action": log.action.lower(),
         "timestamp": datetime.utcnow(),
         "details": log.details
     }
-    result = mongo_collection.insert_one(log_doc)
-    
-    return {"message": "Log created", "log_id": str(result.inserted_id)}
+    log_queue.put_nowait(log_doc)
+
+    return {"message": "Log queued"}
 
 @app.get("/users/{user_id}/logs", response_model=List[LogResponse])
-def get_user_logs_by_id(
-    user_id: int, 
-    db: Session = Depends(get_db),
+async def get_user_logs_by_id(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all logs for a user by user ID"""
-    # Verify user exists
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    """Get logs for a user by user ID (newest first, keyset paginated)"""
+    # Verify user exists without pulling the row over the wire
+    user_exists = await db.scalar(select(exists().where(User.id == user_id)))
+    if not user_exists:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
     # Get logs from MongoDB
+    query = {"user_id": user_id}
+    if before:
+        query.update(_logs_before_filter(before))
+
     mongo_collection = get_mongo()
-    logs = list(mongo_collection.find(
-        {"user_id": user_id}, 
-        {"_id": 0}
-    ).sort("login_timestamp", -1).sort("timestamp", -1))
+    logs = await mongo_collection.find(
+        query,
+        LOG_PROJECTION
+    ).sort([("login_timestamp", -1), ("timestamp", -1)]).batch_size(LOG_BATCH_SIZE).limit(limit).to_list(None)
     
-    # Format logs for response
-    formatted_logs = []
-    for log in logs:
-        formatted_log = LogResponse(
-            user_id=log["user_id"],
-            username=log["username"],
-            action=log["action"],
-            timestamp=log.get("timestamp") or log.get("login_timestamp"),
-            login_timestamp=log.get("login_timestamp"),
-            logout_timestamp=log.get("logout_timestamp"),
-            session_duration=log.get("session_duration"),
-            details=log.get("details")
-        )
-        formatted_logs.append(formatted_log)
-    
-    return formatted_logs
+    return [_log_response(log) for log in logs]
 
 @app.get("/logs/search", response_model=List[LogResponse])
-def search_user_logs(
+async def search_user_logs(
     username: str,
     action: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None,
     current_user: User = Depends(get_current_user)
 ):
     """Search logs by username and optionally filter by action"""
-    # Verify user exists
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+    # No Postgres existence check: Mongo stores the username too, so an
+    # unknown user simply yields an empty list
+
     # Build MongoDB query
     query = {"username": username}
     if action:
-        query["action"] = {"$regex": action, "$options": "i"}  # Case insensitive search
-    
+        # Actions are stored lowercased, so an exact match hits the
+        # compound index; $regex with "i" would force a scan
+        query["action"] = action.lower()
+    if before:
+        query.update(_logs_before_filter(before))
+
     # Get logs from MongoDB
     mongo_collection = get_mongo()
-    logs = list(mongo_collection.find(
-        query, 
-        {"_id": 0}
-    ).sort("login_timestamp", -1).sort("timestamp", -1))
+    logs = await mongo_collection.find(
+        query,
+        LOG_PROJECTION
+    ).sort([("login_timestamp", -1), ("timestamp", -1)]).batch_size(LOG_BATCH_SIZE).limit(limit).to_list(None)
     
-    # Format logs for response
-    formatted_logs = []
-    for log in logs:
-        formatted_log = LogResponse(
-            user_id=log["user_id"],
-            username=log["username"],
-            action=log["action"],
-            timestamp=log.get("timestamp") or log.get("login_timestamp"),
-            login_timestamp=log.get("login_timestamp"),
-            logout_timestamp=log.get("logout_timestamp"),
-            session_duration=log.get("session_duration"),
-            details=log.get("details")
-        )
-        formatted_logs.append(formatted_log)
-    
-    return formatted_logs
+    return [_log_response(log) for log in logs]
 
 @app.get("/logs/sessions", response_model=List[LogResponse])
-def get_all_login_sessions(current_user: User = Depends(get_current_user)):
-    """Get all completed session logs"""
+async def get_all_login_sessions(
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get completed session logs (newest first, keyset paginated)"""
+    query = {"action": "session"}
+    if before:
+        query["login_timestamp"] = {"$lt": before}
+
     mongo_collection = get_mongo()
-    logs = list(mongo_collection.find(
-        {"action": "session"}, 
-        {"_id": 0}
-    ).sort("login_timestamp", -1))
-    
-    # Format logs for response
-    formatted_logs = []
-    for log in logs:
-        formatted_log = LogResponse(
-            user_id=log["user_id"],
-            username=log["username"],  
-            action=log["action"],
-            timestamp=log.get("login_timestamp"),
-            login_timestamp=log.get("login_timestamp"),
-            logout_timestamp=log.get("logout_timestamp"),
-            session_duration=log.get("session_duration"),
-            details=log.get("details")
-        )
-        formatted_logs.append(formatted_log)
+    logs = await mongo_collection.find(
+        query,
+        LOG_PROJECTION
+    ).sort("login_timestamp", -1).batch_size(LOG_BATCH_SIZE).limit(limit).to_list(None)
     
-    return formatted_logs
+    return [_log_response(log) for log in logs]
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # uvloop + httptools: faster event loop and HTTP parser, no code changes
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from elasticsearch import AsyncElasticsearch, Elasticsearch
+from elasticsearch import AsyncElasticsearch
 from typing import List, Dict, Any
 import os
 import asyncio
@@ -12,21 +12,23 @@ class ElasticsearchClient:
     def __init__(self):
         self.es_url = os.getenv("ELASTICSEARCH_URL", "http://localhost:9200")
         self.index_name = os.getenv("ELASTICSEARCH_INDEX", "notes")
-        
-        # Async client for async operations
+        self.async_client = None
+
+    def connect(self):
+        """Build the async client on the running event loop.
+
+        Called from the startup hook rather than at import time so each
+        worker binds the connection pool to its own loop.
+        """
         self.async_client = AsyncElasticsearch(
             [self.es_url],
             request_timeout=30,
             max_retries=3,
-            retry_on_timeout=True
-        )
-        
-        # Sync client for sync operations
-        self.sync_client = Elasticsearch(
-            [self.es_url],
-            request_timeout=30,
-            max_retries=3,
-            retry_on_timeout=True
+            retry_on_timeout=True,
+            # Compress large search responses and allow 25 concurrent
+            # connections per node instead of the default 10
+            http_compress=True,
+            connections_per_node=25
         )
 
     async def create_index(self):
@@ -92,26 +94,6 @@ class ElasticsearchClient:
             logger.error(f"Failed to index note {note.id}: {e}")
             raise
 
-    def index_note_sync(self, note: models.Note):
-        """Index a note in Elasticsearch (sync)"""
-        doc = {
-            "title": note.title,
-            "content": note.content,
-            "created_at": note.created_at.isoformat() if note.created_at else datetime.now().isoformat()
-        }
-        
-        try:
-            response = self.sync_client.index(
-                index=self.index_name,
-                id=note.id,
-                body=doc
-            )
-            logger.debug(f"Indexed note {note.id}: {response}")
-            return response
-        except Exception as e:
-            logger.error(f"Failed to index note {note.id}: {e}")
-            raise
-
     async def search_notes(self, query: str, limit: int = 10) -> List[schemas.NoteSearchResult]:
         """Search notes using Elasticsearch"""
         search_body = {
@@ -124,6 +106,13 @@ class ElasticsearchClient:
                 }
             },
             "size": limit,
+            # Fetch only the fields the response uses, and read created_at
+            # from doc values as epoch millis — much cheaper to parse than
+            # the ISO string in _source
+            "_source": ["title", "content"],
+            "docvalue_fields": [
+                {"field": "created_at", "format": "epoch_millis"}
+            ],
             "sort": [
                 "_score",
                 {"created_at": {"order": "desc"}}
@@ -148,11 +137,12 @@ class ElasticsearchClient:
             results = []
             for hit in response["hits"]["hits"]:
                 source = hit["_source"]
+                created_ms = int(hit["fields"]["created_at"][0])
                 result = schemas.NoteSearchResult(
                     id=int(hit["_id"]),
                     title=source["title"],
                     content=source["content"],
-                    created_at=datetime.fromisoformat(source["created_at"].replace('Z', '+00:00')),
+                    created_at=datetime.utcfromtimestamp(created_ms / 1000),
                     score=hit["_score"]
                 )
                 results.append(result)
@@ -176,20 +166,6 @@ class ElasticsearchClient:
                 logger.error(f"Failed to delete note {note_id}: {e}")
             raise
 
-    def delete_note_sync(self, note_id: int):
-        """Delete a note from Elasticsearch (sync)"""
-        try:
-            response = self.sync_client.delete(
-                index=self.index_name,
-                id=note_id
-            )
-            logger.debug(f"Deleted note {note_id}: {response}")
-            return response
-        except Exception as e:
-            if "not_found" not in str(e).lower():
-                logger.error(f"Failed to delete note {note_id}: {e}")
-            raise
-
     async def health_check(self):
         """Check Elasticsearch cluster health"""
         try:
@@ -200,10 +176,9 @@ class ElasticsearchClient:
             raise
 
     async def close(self):
-        """Close the Elasticsearch clients"""
+        """Close the Elasticsearch client"""
         try:
             await self.async_client.close()
-            self.sync_client.close()
-            logger.info("Closed Elasticsearch clients")
+            logger.info("Closed Elasticsearch client")
         except Exception as e:
-            logger.error(f"Failed to close Elasticsearch clients: {e}")
\ No newline at end of file
+            logger.error(f"Failed to close Elasticsearch client: {e}")
\ No newline at end of file
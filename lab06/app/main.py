@@ -1,8 +1,13 @@
 from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from sqlalchemy.engine.url import make_url
 from typing import List, Optional
+from datetime import datetime
+from elasticsearch import helpers
+import asyncio
 import logging
 
 from . import crud, models, schemas
@@ -20,21 +25,58 @@ models.Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="Notes Search API",
     description="FastAPI application with PostgreSQL and Elasticsearch integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Built once so the health check reuses the same compiled statement
+# instead of re-constructing it per poll
+SELECT_1 = text("SELECT 1")
+
 # Initialize Elasticsearch client
 es_client = ElasticsearchClient()
 
+# Index/delete operations are enqueued by handlers and flushed through a
+# single _bulk request by a background task, keeping per-note ES round
+# trips out of the request path
+es_queue: asyncio.Queue = asyncio.Queue()
+ES_FLUSH_INTERVAL = 0.5  # seconds
+ES_FLUSH_MAX_BATCH = 500
+
+async def flush_es_queue():
+    """Drain queued Elasticsearch operations with helpers.async_bulk"""
+    while True:
+        batch = [await es_queue.get()]
+        # Short flush window lets concurrent requests fill the batch
+        await asyncio.sleep(ES_FLUSH_INTERVAL)
+        while len(batch) < ES_FLUSH_MAX_BATCH:
+            try:
+                batch.append(es_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await helpers.async_bulk(
+                es_client.async_client,
+                batch,
+                refresh=False,
+                request_timeout=60,
+                raise_on_error=False
+            )
+        except Exception as e:
+            logger.warning(f"Failed to bulk-flush {len(batch)} Elasticsearch operation(s): {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize Elasticsearch index on startup"""
+    es_client.connect()
     try:
         await es_client.create_index()
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Elasticsearch: {e}")
 
+    app.state.es_flusher = asyncio.create_task(flush_es_queue())
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
@@ -56,7 +98,7 @@ def health_check_db():
     """Database health check"""
     try:
         with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+            conn.execute(SELECT_1)
         return {"status": "healthy", "service": "postgresql"}
     except Exception as e:
         try:
@@ -81,20 +123,27 @@ async def health_check_elasticsearch():
         raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
 
 @app.post("/notes", response_model=schemas.Note)
-def create_note(note: schemas.NoteCreate, db: Session = Depends(get_db)):
+async def create_note(note: schemas.NoteCreate, db: Session = Depends(get_db)):
     """Create a new note"""
     try:
-        # Save to PostgreSQL
-        db_note = crud.create_note(db=db, note=note)
+        # Save to PostgreSQL; the sync crud call runs in the threadpool
+        # so the commit doesn't block the event loop
+        db_note = await run_in_threadpool(crud.create_note, db=db, note=note)
         logger.info(f"Created note with ID: {db_note.id}")
-        
-        # Index in Elasticsearch (fire and forget - don't fail if ES is down)
-        try:
-            es_client.index_note_sync(db_note)
-            logger.info(f"Indexed note {db_note.id} in Elasticsearch")
-        except Exception as es_error:
-            logger.warning(f"Failed to index note in Elasticsearch: {es_error}")
-        
+
+        # Queue for the background bulk indexer (fire and forget - don't
+        # fail if ES is down)
+        es_queue.put_nowait({
+            "_op_type": "index",
+            "_index": es_client.index_name,
+            "_id": db_note.id,
+            "_source": {
+                "title": db_note.title,
+                "content": db_note.content,
+                "created_at": db_note.created_at.isoformat() if db_note.created_at else datetime.now().isoformat()
+            }
+        })
+
         return db_note
     except Exception as e:
         logger.error(f"Failed to create note: {e}")
@@ -129,21 +178,22 @@ async def search_notes(
         raise HTTPException(status_code=500, detail="Search service unavailable")
 
 @app.delete("/notes/{note_id}")
-def delete_note(note_id: int, db: Session = Depends(get_db)):
+async def delete_note(note_id: int, db: Session = Depends(get_db)):
     """Delete a note"""
     try:
-        # Delete from PostgreSQL
-        deleted = crud.delete_note(db=db, note_id=note_id)
+        # Delete from PostgreSQL in the threadpool, off the event loop
+        deleted = await run_in_threadpool(crud.delete_note, db=db, note_id=note_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Note not found")
-        
-        # Remove from Elasticsearch (fire and forget)
-        try:
-            es_client.delete_note_sync(note_id)
-            logger.info(f"Deleted note {note_id} from Elasticsearch")
-        except Exception as es_error:
-            logger.warning(f"Failed to delete note from Elasticsearch: {es_error}")
-        
+
+        # Queue the Elasticsearch delete for the background bulk flusher
+        # (fire and forget)
+        es_queue.put_nowait({
+            "_op_type": "delete",
+            "_index": es_client.index_name,
+            "_id": note_id
+        })
+
         return {"message": "Note deleted successfully"}
     except HTTPException:
         raise
@@ -1,56 +1,257 @@
 import redis
-import json
+import asyncio
+import orjson
 import os
+import random
+import uuid
 from typing import Optional, Any
 from dotenv import load_dotenv
+import logging
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Written under a key whose loader failed or found nothing, so waiters
+# stop polling and fail fast; expires quickly to let a real value land.
+# Never collides with stored payloads, which are always orjson output.
+MISS_SENTINEL = "__miss__"
+MISS_TTL = 5  # seconds
+
+# Release the lock only if we still own it (compare-and-delete)
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class CachePipeline:
+    """Accumulates cache invalidations and flushes them together on exit,
+    instead of one Redis round trip per delete"""
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._keys = []
+        self._tags = []
+
+    def delete(self, key: str) -> None:
+        self._keys.append(key)
+
+    def delete_tag(self, tag: str) -> None:
+        self._tags.append(tag)
+
+    async def execute(self) -> None:
+        try:
+            keys = list(self._keys)
+            if self._tags:
+                # One pipelined read resolves all tag memberships
+                read = self._redis.pipeline()
+                for tag in self._tags:
+                    read.smembers(f"tag:{tag}")
+                for tag, members in zip(self._tags, read.execute()):
+                    keys.extend(members)
+                    keys.append(f"tag:{tag}")
+            if keys:
+                pipe = self._redis.pipeline()
+                for key in keys:
+                    pipe.delete(key)
+                pipe.execute()
+        except Exception as e:
+            logger.warning("Cache pipeline error: %s", e)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.execute()
+
 class RedisCache:
     def __init__(self):
         self.redis_client = redis.from_url(
             os.getenv("REDIS_URL", "redis://localhost:6379/0"),
             decode_responses=True
         )
-    
+
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
         try:
             value = self.redis_client.get(key)
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
-            print(f"Cache get error: {e}")
+            logger.warning("Cache get error: %s", e)
             return None
     
-    async def set(self, key: str, value: Any, expire: int = 300) -> bool:
-        """Set value in cache with expiration (default 5 minutes)"""
+    async def get_raw(self, key: str):
+        """Get the stored serialized payload without deserializing it -
+        callers can hand it straight to an HTTP response"""
+        try:
+            return self.redis_client.get(key)
+        except Exception as e:
+            logger.warning("Cache get error: %s", e)
+            return None
+
+    @staticmethod
+    def _jittered(ttl: int, jitter: float) -> int:
+        """Spread a TTL across a ±jitter/2 window so entries written
+        together don't all expire in the same instant"""
+        return max(1, int(ttl * (1 - jitter / 2 + jitter * random.random())))
+
+    async def set(self, key: str, value: Any, expire: int = 300, jitter: float = 0.2,
+                  tags: Optional[list] = None) -> bool:
+        """Set value in cache with jittered expiration (default 5 minutes).
+
+        Keys registered under tags can be invalidated as a group with
+        invalidate_tag, without scanning the keyspace.
+        """
         try:
-            serialized_value = json.dumps(value, default=str)
-            return self.redis_client.setex(key, expire, serialized_value)
+            # Loaders dump with mode="json", so payloads are already plain
+            # JSON types; no default fallback needed
+            serialized_value = orjson.dumps(value)
+            pipe = self.redis_client.pipeline()
+            pipe.setex(key, self._jittered(expire, jitter), serialized_value)
+            for tag in tags or []:
+                pipe.sadd(f"tag:{tag}", key)
+            return pipe.execute()[0]
         except Exception as e:
-            print(f"Cache set error: {e}")
+            logger.warning("Cache set error: %s", e)
             return False
     
+    async def get_or_set(self, key: str, loader, expire: int = 300, lock_ttl: int = 5000,
+                         tags: Optional[list] = None, raw: bool = False):
+        """Get from cache, or load and populate under a single-flight lock.
+
+        On a miss, only one caller per key acquires the SET NX PX lock and
+        runs the loader; the others poll the cache until the winner
+        populates it, so a hot key can't stampede the database.
+
+        With raw=True the serialized JSON payload is returned as-is,
+        ready to ship in a Response without re-validation.
+
+        A failed loader leaves a short-TTL negative marker under the
+        key, so concurrent requests for e.g. a missing ID re-raise
+        immediately instead of polling out the whole lock_ttl.
+        """
+        hit = await self.get_raw(key)
+        if hit == MISS_SENTINEL:
+            # The loader just came up empty for this key; fail fast
+            value = await loader()
+            return orjson.dumps(value) if raw else value
+        if hit is not None:
+            logger.debug("Cache HIT for %s", key)
+            if raw:
+                return hit
+            try:
+                return orjson.loads(hit)
+            except Exception as e:
+                logger.warning("Cache get error: %s", e)
+
+        logger.debug("Cache MISS for %s", key)
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis_client.set(
+                lock_key, token, nx=True, px=self._jittered(lock_ttl, 0.2)
+            )
+        except Exception as e:
+            logger.warning("Cache lock error: %s", e)
+            # Redis is down; get/set already degrade to the DB
+            acquired = True
+            token = None
+
+        if acquired:
+            try:
+                try:
+                    value = await loader()
+                except Exception:
+                    self._mark_missing(key)
+                    raise
+                if value is not None:
+                    await self.set(key, value, expire, tags=tags)
+                else:
+                    self._mark_missing(key)
+                if raw:
+                    return orjson.dumps(value)
+                return value
+            finally:
+                if token:
+                    try:
+                        self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                    except Exception as e:
+                        logger.warning("Cache unlock error: %s", e)
+
+        # Lost the race: wait for the winner to populate the cache
+        waited = 0.0
+        while waited < lock_ttl / 1000:
+            await asyncio.sleep(0.05)
+            waited += 0.05
+            hit = await self.get_raw(key)
+            if hit == MISS_SENTINEL:
+                # Winner's loader found nothing; stop waiting
+                break
+            if hit is not None:
+                return hit if raw else orjson.loads(hit)
+
+        # Winner died, took too long, or came up empty; load it ourselves
+        value = await loader()
+        if raw:
+            return orjson.dumps(value)
+        return value
+
+    def _mark_missing(self, key: str) -> None:
+        """Park the short-lived negative marker under a key"""
+        try:
+            self.redis_client.setex(key, MISS_TTL, MISS_SENTINEL)
+        except Exception as e:
+            logger.warning("Cache miss-marker error: %s", e)
+
     async def delete(self, key: str) -> bool:
         """Delete key from cache"""
         try:
             return self.redis_client.delete(key) > 0
         except Exception as e:
-            print(f"Cache delete error: {e}")
+            logger.warning("Cache delete error: %s", e)
             return False
     
-    async def delete_pattern(self, pattern: str) -> int:
-        """Delete all keys matching pattern"""
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete every key registered under a tag.
+
+        Cost scales with the tag's membership, unlike KEYS/SCAN pattern
+        deletes which walk the entire keyspace.
+        """
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
-            return 0
+            tag_key = f"tag:{tag}"
+            keys = self.redis_client.smembers(tag_key)
+            pipe = self.redis_client.pipeline()
+            for key in keys:
+                pipe.delete(key)
+            pipe.delete(tag_key)
+            results = pipe.execute()
+            return sum(results[:-1])
         except Exception as e:
-            print(f"Cache delete pattern error: {e}")
+            logger.warning("Cache invalidate tag error: %s", e)
             return 0
 
+    def pipeline(self) -> CachePipeline:
+        """Batch several invalidations into one round trip:
+        async with cache.pipeline() as p: p.delete(...); p.delete_tag(...)"""
+        return CachePipeline(self.redis_client)
+
+    async def flush(self) -> bool:
+        """Wipe this service's Redis DB in O(1).
+
+        FLUSHDB ASYNC hands reclamation to a background thread, where a
+        pattern delete would SCAN the whole keyspace and block Redis for
+        the duration. Point REDIS_URL at a dedicated DB index if the
+        instance is shared with other services.
+        """
+        try:
+            return self.redis_client.flushdb(asynchronous=True)
+        except Exception as e:
+            logger.warning("Cache flush error: %s", e)
+            return False
+
 # Global cache instance
 cache = RedisCache()
\ No newline at end of file
@@ -1,62 +1,122 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, exists, bindparam
+from sqlalchemy.orm import selectinload
 from . import models, schemas
+from .database import db_session_ctx
 
-def get_user(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.id == user_id).first()
+# Built once at import: the hottest lookups skip per-call select()
+# construction and bind straight into the cached compilation
+_GET_USER_STMT = select(models.User).where(models.User.id == bindparam("uid"))
+_GET_USER_BY_EMAIL_STMT = select(models.User).where(models.User.email == bindparam("email"))
+_GET_NOTE_STMT = select(models.Note).where(models.Note.id == bindparam("nid"))
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(models.User).filter(models.User.email == email).first()
+async def get_user(user_id: int):
+    db = db_session_ctx.get()
+    return await db.scalar(_GET_USER_STMT, {"uid": user_id})
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+async def user_exists(user_id: int) -> bool:
+    # SELECT EXISTS returns a bare boolean instead of hydrating a row
+    db = db_session_ctx.get()
+    return await db.scalar(select(exists().where(models.User.id == user_id)))
 
-def create_user(db: Session, user: schemas.UserCreate):
+async def get_user_with_notes(user_id: int):
+    db = db_session_ctx.get()
+    result = await db.execute(
+        select(models.User)
+        .where(models.User.id == user_id)
+        .options(selectinload(models.User.notes))
+    )
+    return result.scalar_one_or_none()
+
+async def get_user_by_email(email: str):
+    db = db_session_ctx.get()
+    return await db.scalar(_GET_USER_BY_EMAIL_STMT, {"email": email})
+
+async def get_users(skip: int = 0, limit: int = 100):
+    db = db_session_ctx.get()
+    result = await db.execute(select(models.User).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def create_user(user: schemas.UserCreate):
+    db = db_session_ctx.get()
     db_user = models.User(name=user.name, email=user.email)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def update_user(db: Session, user_id: int, user: schemas.UserUpdate):
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
-    if db_user:
-        update_data = user.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
-        db.commit()
-        db.refresh(db_user)
-    return db_user
+async def update_user(user_id: int, user: schemas.UserUpdate):
+    """Update a user; returns (user, prior email) so callers can
+    invalidate the old address's cache entry, or (None, None)"""
+    db = db_session_ctx.get()
+    db_user = await get_user(user_id)
+    if db_user is None:
+        return None, None
+    old_email = db_user.email
+    update_data = user.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_user, field, value)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user, old_email
 
-def get_note(db: Session, note_id: int):
-    return db.query(models.Note).filter(models.Note.id == note_id).first()
+async def get_note(note_id: int):
+    db = db_session_ctx.get()
+    return await db.scalar(_GET_NOTE_STMT, {"nid": note_id})
 
-def get_notes(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Note).offset(skip).limit(limit).all()
+async def get_notes(after_id: int = 0, limit: int = 100):
+    # Keyset paging: id > cursor seeks straight to the page, where
+    # OFFSET would walk and discard every earlier row
+    db = db_session_ctx.get()
+    result = await db.execute(
+        select(models.Note)
+        .where(models.Note.id > after_id)
+        .order_by(models.Note.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
 
-def get_user_notes(db: Session, user_id: int):
-    return db.query(models.Note).filter(models.Note.user_id == user_id).all()
+async def get_user_notes(user_id: int, after_id: int = 0, limit: int = 100):
+    db = db_session_ctx.get()
+    result = await db.execute(
+        select(models.Note)
+        .where(models.Note.user_id == user_id, models.Note.id > after_id)
+        .order_by(models.Note.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
 
-def create_note(db: Session, note: schemas.NoteCreate):
+async def create_note(note: schemas.NoteCreate):
+    db = db_session_ctx.get()
     db_note = models.Note(**note.dict())
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note)
     return db_note
 
-def update_note(db: Session, note_id: int, note: schemas.NoteUpdate):
-    db_note = db.query(models.Note).filter(models.Note.id == note_id).first()
-    if db_note:
-        update_data = note.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_note, field, value)
-        db.commit()
-        db.refresh(db_note)
+async def update_note(note_id: int, note: schemas.NoteUpdate):
+    update_data = note.dict(exclude_unset=True)
+    if not update_data:
+        return await get_note(note_id)
+    db = db_session_ctx.get()
+    # Single UPDATE ... RETURNING instead of SELECT + UPDATE + refresh
+    result = await db.execute(
+        update(models.Note)
+        .where(models.Note.id == note_id)
+        .values(**update_data)
+        .returning(models.Note)
+    )
+    db_note = result.scalar_one_or_none()
+    await db.commit()
     return db_note
 
-def delete_note(db: Session, note_id: int):
-    db_note = db.query(models.Note).filter(models.Note.id == note_id).first()
-    if db_note:
-        db.delete(db_note)
-        db.commit()
-        return True
-    return False
\ No newline at end of file
+async def delete_note(note_id: int):
+    """Delete a note; returns its user_id, or None if it didn't exist"""
+    db = db_session_ctx.get()
+    result = await db.execute(
+        delete(models.Note)
+        .where(models.Note.id == note_id)
+        .returning(models.Note.user_id)
+    )
+    user_id = result.scalar_one_or_none()
+    await db.commit()
+    return user_id
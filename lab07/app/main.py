@@ -1,181 +1,194 @@
-from fastapi import FastAPI, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
 from typing import List
 import asyncio
+import os
 
 from . import crud, models, schemas
-from .database import SessionLocal, engine, get_db
+from .database import SessionLocal, db_session_ctx, engine
 from .cache import cache
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # DDL only when explicitly asked for (first boot / local dev);
+    # production schema changes belong to Alembic
+    if os.getenv("AUTO_CREATE_TABLES", "true").lower() in ("1", "true", "yes"):
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
+    yield
 
-app = FastAPI(title="Redis Cache Lab", description="Notes API with Redis caching")
+app = FastAPI(
+    title="Redis Cache Lab",
+    description="Notes API with Redis caching",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# One session per request with an explicit lifetime; crud reads it from
+# the contextvar, so endpoints skip per-request Depends resolution
+@app.middleware("http")
+async def db_session_middleware(request: Request, call_next):
+    async with SessionLocal() as session:
+        token = db_session_ctx.set(session)
+        try:
+            return await call_next(request)
+        finally:
+            db_session_ctx.reset(token)
 
 @app.get("/")
 async def root():
     return {"message": "Redis Cache Lab - Notes API"}
 
+# Invalidations run as background tasks after the response is sent, so
+# writes don't wait on Redis round trips
+async def _invalidate_note_caches(note_id: int, user_id: int):
+    async with cache.pipeline() as pipe:
+        pipe.delete(f"note:{note_id}")
+        pipe.delete(f"user:{user_id}:profile")
+        pipe.delete_tag("notes")
+
+async def _invalidate_user_caches(user_id: int, email: str = None):
+    async with cache.pipeline() as pipe:
+        pipe.delete(f"user:{user_id}:profile")
+        pipe.delete_tag("users")
+        if email:
+            pipe.delete(f"user:email:{email}")
+
 # User endpoints
 @app.post("/users/", response_model=schemas.User)
-async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def create_user(user: schemas.UserCreate, background_tasks: BackgroundTasks):
+    # Known-registered emails short-circuit to 400 without touching the DB
+    email_key = f"user:email:{user.email}"
+    cached_id = await cache.get(email_key)
+    if cached_id is not None:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    db_user = await crud.get_user_by_email(email=user.email)
     if db_user:
+        await cache.set(email_key, db_user.id, expire=300)
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    new_user = crud.create_user(db=db, user=user)
-    
-    # Invalidate users cache
-    await cache.delete_pattern("users:*")
-    
+
+    new_user = await crud.create_user(user=user)
+
+    # The new email is now registered; cache it and invalidate profiles
+    # after the response goes out
+    await cache.set(email_key, new_user.id, expire=300)
+    background_tasks.add_task(cache.invalidate_tag, "users")
+
     return new_user
 
-@app.get("/users/{user_id}", response_model=schemas.UserWithNotes)
-async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+@app.get("/users/{user_id}")
+async def get_user_profile(user_id: int):
     cache_key = f"user:{user_id}:profile"
-    
-    # Try to get from cache first
-    cached_user = await cache.get(cache_key)
-    if cached_user:
-        print(f"Cache HIT for user {user_id}")
-        return cached_user
-    
-    print(f"Cache MISS for user {user_id}")
-    
-    # Get from database
-    db_user = crud.get_user(db, user_id=user_id)
-    if db_user is None:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Get user's notes
-    user_notes = crud.get_user_notes(db, user_id=user_id)
-    
-    user_data = {
-        "id": db_user.id,
-        "name": db_user.name,
-        "email": db_user.email,
-        "created_at": db_user.created_at,
-        "updated_at": db_user.updated_at,
-        "notes": [
-            {
-                "id": note.id,
-                "title": note.title,
-                "content": note.content,
-                "user_id": note.user_id,
-                "created_at": note.created_at,
-                "updated_at": note.updated_at
-            } for note in user_notes
-        ]
-    }
-    
-    # Cache the result for 5 minutes
-    await cache.set(cache_key, user_data, expire=300)
-    
-    return user_data
+
+    async def load_user_profile():
+        # Get user and notes from the database in one eager-loaded query
+        db_user = await crud.get_user_with_notes(user_id=user_id)
+        if db_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # pydantic-core walks the ORM graph in native code - faster than
+        # a hand-written dict with a list comprehension over the notes
+        adapter = schemas.USER_WITH_NOTES_ADAPTER
+        return adapter.dump_python(
+            adapter.validate_python(db_user, from_attributes=True),
+            mode="json"
+        )
+
+    # Cache for 5 minutes; the single-flight lock keeps concurrent misses
+    # from stampeding the database. The cached payload is already the
+    # response JSON, so it goes out without a Pydantic round trip.
+    payload = await cache.get_or_set(
+        cache_key, load_user_profile, expire=300, tags=["users"], raw=True
+    )
+    return Response(content=payload, media_type="application/json")
 
 @app.put("/users/{user_id}", response_model=schemas.User)
-async def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(get_db)):
-    db_user = crud.update_user(db=db, user_id=user_id, user=user)
+async def update_user(user_id: int, user: schemas.UserUpdate, background_tasks: BackgroundTasks):
+    db_user, old_email = await crud.update_user(user_id=user_id, user=user)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    # Invalidate user cache
-    await cache.delete(f"user:{user_id}:profile")
-    await cache.delete_pattern("users:*")
-    
+
+    # An email change frees the old address, so its cached "already
+    # registered" entry has to go; the new one is simply registered now
+    changed_email = old_email if user.email and user.email != old_email else None
+    background_tasks.add_task(_invalidate_user_caches, user_id, changed_email)
+
     return db_user
 
 # Note endpoints
-@app.get("/notes/{note_id}", response_model=schemas.Note)
-async def get_note(note_id: int, db: Session = Depends(get_db)):
+@app.get("/notes/{note_id}")
+async def get_note(note_id: int):
     cache_key = f"note:{note_id}"
-    
-    # Try to get from cache first
-    cached_note = await cache.get(cache_key)
-    if cached_note:
-        print(f"Cache HIT for note {note_id}")
-        return cached_note
-    
-    print(f"Cache MISS for note {note_id}")
-    
-    # Get from database
-    db_note = crud.get_note(db, note_id=note_id)
-    if db_note is None:
-        raise HTTPException(status_code=404, detail="Note not found")
-    
-    note_data = {
-        "id": db_note.id,
-        "title": db_note.title,
-        "content": db_note.content,
-        "user_id": db_note.user_id,
-        "created_at": db_note.created_at,
-        "updated_at": db_note.updated_at
-    }
-    
-    # Cache the result for 5 minutes
-    await cache.set(cache_key, note_data, expire=300)
-    
-    return note_data
+
+    async def load_note():
+        # Get from database
+        db_note = await crud.get_note(note_id=note_id)
+        if db_note is None:
+            raise HTTPException(status_code=404, detail="Note not found")
+
+        adapter = schemas.NOTE_ADAPTER
+        return adapter.dump_python(
+            adapter.validate_python(db_note, from_attributes=True),
+            mode="json"
+        )
+
+    # Cache for 5 minutes; the single-flight lock keeps concurrent misses
+    # from stampeding the database. The cached payload is already the
+    # response JSON, so it goes out without a Pydantic round trip.
+    payload = await cache.get_or_set(cache_key, load_note, expire=300, tags=["notes"], raw=True)
+    return Response(content=payload, media_type="application/json")
 
 @app.post("/notes/", response_model=schemas.Note)
-async def create_note(note: schemas.NoteCreate, db: Session = Depends(get_db)):
+async def create_note(note: schemas.NoteCreate, background_tasks: BackgroundTasks):
     # Check if user exists
-    user = crud.get_user(db, user_id=note.user_id)
-    if not user:
+    if not await crud.user_exists(user_id=note.user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    
-    new_note = crud.create_note(db=db, note=note)
-    
-    # Invalidate related caches
-    await cache.delete(f"user:{note.user_id}:profile")
-    await cache.delete_pattern("notes:*")
-    
+
+    new_note = await crud.create_note(note=note)
+
+    background_tasks.add_task(_invalidate_note_caches, new_note.id, note.user_id)
+
     return new_note
 
 @app.put("/notes/{note_id}", response_model=schemas.Note)
-async def update_note(note_id: int, note: schemas.NoteUpdate, db: Session = Depends(get_db)):
-    # Get the note to find user_id before updating
-    db_note = crud.get_note(db, note_id=note_id)
-    if not db_note:
+async def update_note(note_id: int, note: schemas.NoteUpdate, background_tasks: BackgroundTasks):
+    # UPDATE ... RETURNING already hands back user_id, so no pre-fetch
+    updated_note = await crud.update_note(note_id=note_id, note=note)
+    if updated_note is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    
-    updated_note = crud.update_note(db=db, note_id=note_id, note=note)
-    
-    # Invalidate caches
-    await cache.delete(f"note:{note_id}")
-    await cache.delete(f"user:{db_note.user_id}:profile")
-    await cache.delete_pattern("notes:*")
-    
+
+    background_tasks.add_task(_invalidate_note_caches, note_id, updated_note.user_id)
+
     return updated_note
 
 @app.delete("/notes/{note_id}")
-async def delete_note(note_id: int, db: Session = Depends(get_db)):
-    # Get the note to find user_id before deleting
-    db_note = crud.get_note(db, note_id=note_id)
-    if not db_note:
+async def delete_note(note_id: int, background_tasks: BackgroundTasks):
+    # DELETE ... RETURNING hands back the user_id for cache invalidation,
+    # so no pre-fetch is needed
+    user_id = await crud.delete_note(note_id=note_id)
+    if user_id is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    
-    success = crud.delete_note(db=db, note_id=note_id)
-    if not success:
-        raise HTTPException(status_code=404, detail="Note not found")
-    
-    # Invalidate caches
-    await cache.delete(f"note:{note_id}")
-    await cache.delete(f"user:{db_note.user_id}:profile")
-    await cache.delete_pattern("notes:*")
-    
+
+    background_tasks.add_task(_invalidate_note_caches, note_id, user_id)
+
     return {"message": "Note deleted successfully"}
 
 @app.get("/notes/", response_model=List[schemas.Note])
-async def get_all_notes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    notes = crud.get_notes(db, skip=skip, limit=limit)
+async def get_all_notes(
+    after_id: int = 0,
+    limit: int = Query(100, ge=1, le=500)
+):
+    """List notes by ascending id; pass the last id back as after_id"""
+    notes = await crud.get_notes(after_id=after_id, limit=limit)
     return notes
 
 # Cache management endpoints
 @app.post("/cache/clear")
 async def clear_cache():
     """Clear all cache entries"""
-    await cache.delete_pattern("*")
+    await cache.flush()
     return {"message": "Cache cleared successfully"}
 
 @app.get("/health")
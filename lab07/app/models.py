@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -16,6 +16,9 @@ class User(Base):
 
 class Note(Base):
     __tablename__ = "notes"
+    # Serves the per-user note lookups (and keyset paging on id) as an
+    # index range scan instead of a sequential scan
+    __table_args__ = (Index("ix_notes_user_id_id", "user_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
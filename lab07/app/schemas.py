@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
 from typing import List, Optional
 
@@ -42,4 +42,9 @@ class Note(NoteBase):
         from_attributes = True
 
 class UserWithNotes(User):
-    notes: List[Note] = []
\ No newline at end of file
+    notes: List[Note] = []
+
+# Module-level adapters: pydantic-core builds the validator/serializer
+# once per process, so hot paths skip per-call schema resolution
+USER_WITH_NOTES_ADAPTER = TypeAdapter(UserWithNotes)
+NOTE_ADAPTER = TypeAdapter(Note)
\ No newline at end of file